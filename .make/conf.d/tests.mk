@@ -7,9 +7,15 @@ coverage: check-python-venv
 	coverage html -d htmlcov; \
 	coverage report -m
 
+.PHONY: benchmark
+benchmark: check-python-venv
+	@echo "Running benchmarks for $(TEXT_BOLD)$(appname_verbose)$(TEXT_BOLD_END)…"
+	@pytest -m benchmark nextcloud_contacts_to_gequdio
+
 # Help
 .PHONY: help
 help::
 	@echo "  $(TEXT_UNDERLINE)Tests:$(TEXT_UNDERLINE_END)"
+	@echo "    benchmark                   Run the performance benchmarks"
 	@echo "    coverage                    Run tests and create a coverage report"
 	@echo ""
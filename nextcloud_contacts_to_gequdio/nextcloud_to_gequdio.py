@@ -5,47 +5,99 @@ This script connects to a Nextcloud instance via WebDAV, retrieves contacts from
 and converts them into GEQUDIO-compatible contact XML format.
 
 Requirements:
+- defusedxml
 - requests
 
 """
 
 # Standard Library
 import configparser
+import functools
+import json
+import logging
 import os
 import re
 import sys
-import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
 from pathlib import Path
-from urllib.parse import urljoin
+from urllib.parse import quote, unquote, urlsplit
+from xml.sax.saxutils import escape
 
 # Third Party
+import defusedxml.ElementTree as ET
 import requests
 from requests.auth import HTTPBasicAuth
 
 # Nextcloud Contacts to GEQUDIO
 from nextcloud_contacts_to_gequdio import __github_repo__, __version__
 
+logger = logging.getLogger(__name__)
+
+# Matches the start of a vCard property line ("PROP:" or "PROP;PARAMS:")
+_PROP_RE = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
+
+# The only vCard properties needed for the GEQUDIO directory
+_VCARD_PROPS = frozenset({"FN", "N", "TEL"})
+
+# Phone number normalization
+_NONDIGIT_RE = re.compile(r"[^0-9*]+")
+
+# TEL types mapped to GEQUDIO tags, in order of precedence.
+# GEQUDIO sees "Telephone" as "Office", so map accordingly here.
+_TEL_TYPE_GROUPS = (
+    ("Telephone", frozenset({"work", "desk", "office"})),
+    ("Mobile", frozenset({"cell", "mobile"})),
+)
+
+# Qualified names of the multistatus elements used from CardDAV responses
+_DAV_RESPONSE = "{DAV:}response"
+_DAV_HREF = "{DAV:}href"
+_DAV_STATUS = "{DAV:}status"
+_DAV_SYNC_TOKEN = "{DAV:}sync-token"
+_CARDDAV_ADDRESS_DATA = "{urn:ietf:params:xml:ns:carddav}address-data"
+_PROPSTAT_ADDRESS_DATA = f"{{DAV:}}propstat/{{DAV:}}prop/{_CARDDAV_ADDRESS_DATA}"
+
+# CardDAV addressbook-query REPORT body, returning all vCards inline
+_ADDRESSBOOK_QUERY = b"""<?xml version="1.0"?>
+<C:addressbook-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:carddav">
+    <D:prop>
+        <D:getetag/>
+        <C:address-data/>
+    </D:prop>
+    <C:filter/>
+</C:addressbook-query>
+"""
 
-def load_settings(path: str) -> dict:
+# WebDAV sync-collection REPORT body (RFC 6578), returning only the vCards changed
+# since the given sync-token (an empty token returns all of them)
+_SYNC_COLLECTION = """<?xml version="1.0"?>
+<D:sync-collection xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:carddav">
+    <D:sync-token>{sync_token}</D:sync-token>
+    <D:sync-level>1</D:sync-level>
+    <D:prop>
+        <D:getetag/>
+        <C:address-data/>
+    </D:prop>
+</D:sync-collection>
+"""
+
+
+def load_settings_from_config(
+    config: configparser.ConfigParser, source: str = "<config>"
+) -> dict:
     """
-    Loads Nextcloud connection settings from an INI file.
+    Extracts Nextcloud connection settings from a parsed configuration.
 
-    :param path: Path to the INI file.
-    :type path: str
+    :param config: Parsed configuration
+    :type config: configparser.ConfigParser
+    :param source: Name of the configuration source, used in error messages
+    :type source: str
     :return: Dictionary with settings: url, username, password, addressbook, verify_ssl
     :rtype: dict
     """
 
-    config = configparser.ConfigParser()
-    settings_file = Path(path)
-
-    if not settings_file.exists():
-        raise FileNotFoundError(f"Settings file not found: {settings_file}")
-
-    config.read(settings_file)
-
     if "nextcloud" not in config:
-        raise KeyError(f"Missing 'nextcloud' section in {settings_file}")
+        raise KeyError(f"Missing 'nextcloud' section in {source}")
 
     section = config["nextcloud"]
 
@@ -63,6 +115,28 @@ def load_settings(path: str) -> dict:
     }
 
 
+def load_settings(path: str) -> dict:
+    """
+    Loads Nextcloud connection settings from an INI file.
+
+    :param path: Path to the INI file.
+    :type path: str
+    :return: Dictionary with settings: url, username, password, addressbook, verify_ssl
+    :rtype: dict
+    """
+
+    # No interpolation, so a "%" (e.g. in the password) is read literally
+    config = configparser.ConfigParser(interpolation=None)
+    settings_file = Path(path)
+
+    if not settings_file.exists():
+        raise FileNotFoundError(f"Settings file not found: {settings_file}")
+
+    config.read(settings_file)
+
+    return load_settings_from_config(config, source=str(settings_file))
+
+
 class NextcloudWebDAVClient:
     """
     Minimal WebDAV client for Nextcloud Contacts.
@@ -91,19 +165,25 @@ class NextcloudWebDAVClient:
         :type verify_ssl: bool
         """
 
-        self.base_url = urljoin(
-            url.rstrip("/") + "/",
-            f"remote.php/dav/addressbooks/users/{username}/{addressbook}/",
+        # Username and addressbook are path segments, reserved characters in them
+        # (e.g. "/" or "#") must not change the URL structure
+        self.base_url = (
+            f"{url.rstrip('/')}/remote.php/dav/addressbooks/users/"
+            f"{quote(username, safe='')}/{quote(addressbook, safe='')}/"
         )
         self.session = requests.Session()
         self.session.auth = HTTPBasicAuth(username=username, password=password)
+        self.session.headers["User-Agent"] = self._get_user_agent()
         self.verify = verify_ssl
 
     @staticmethod
+    @functools.cache
     def _get_user_agent() -> str:
         """
         Returns a default User-Agent string for HTTP requests.
 
+        The string only depends on package versions, so it is built once.
+
         :return: User-Agent string
         :rtype: str
         """
@@ -124,6 +204,8 @@ class NextcloudWebDAVClient:
             - flag-style parameters (e.g. TEL;HOME:...)
             - preserving raw values for malformed TYPE values (e.g. TYPE=HOME=WORK)
 
+        Repeated types are only returned once, in order of first appearance.
+
         :param key: TEL property key
         :type key: str
         :return: List of telephone types
@@ -133,8 +215,9 @@ class NextcloudWebDAVClient:
         if not key:
             return []
 
-        # Consider only the portion before the first colon
-        params_part = key.split(":", 1)[0]
+        # Consider only the portion before the first colon, lower-cased once
+        # (parameter names and types are case-insensitive)
+        params_part = key.partition(":")[0].lower()
 
         # Split off the property name (e.g. "TEL") and keep parameters
         tokens = params_part.split(";")
@@ -143,6 +226,7 @@ class NextcloudWebDAVClient:
 
         params = tokens[1:]
         types: list[str] = []
+        seen: set[str] = set()
 
         for p in params:
             p = p.strip()
@@ -150,64 +234,99 @@ class NextcloudWebDAVClient:
             if not p:
                 continue
 
-            if "=" in p:
-                param_name, param_value = p.split("=", 1)
+            param_name, sep, param_value = p.partition("=")
 
-                if param_name.strip().upper() == "TYPE":
+            if sep:
+                if param_name.strip() == "type":
                     for t in param_value.split(","):
-                        t_clean = t.strip().lower()
+                        t_clean = t.strip()
 
-                        if t_clean:
+                        if t_clean and t_clean not in seen:
+                            seen.add(t_clean)
                             types.append(t_clean)
-            else:
+            elif p not in seen:
                 # flag-style parameter (e.g. HOME, WORK)
-                types.append(p.lower())
+                seen.add(p)
+                types.append(p)
 
         return types
 
     @staticmethod
-    def _unfold_lines(
-        lines_list: list[str], prop_pattern: re.Pattern[str]
-    ) -> list[str]:
+    def _iter_unfolded_lines(
+        lines: Iterable[str], prop_pattern: re.Pattern[str] = _PROP_RE
+    ) -> Iterator[str]:
         """
-        Unfolds folded lines in a vCard according to RFC 6350.
+        Lazily unfolds folded lines in a vCard according to RFC 6350.
 
-        :param lines_list: List of vCard lines
-        :type lines_list: list[str]
-        :param prop_pattern: Compiled regex pattern to identify property lines
+        Each logical line is yielded as soon as the next property starts, so no
+        list of unfolded lines is built.
+
+        :param lines: vCard lines
+        :type lines: Iterable[str]
+        :param prop_pattern: Compiled regex pattern to identify property lines (default: _PROP_RE)
         :type prop_pattern: re.Pattern[str]
-        :return: List of unfolded vCard lines
-        :rtype: list[str]
+        :return: Iterator over unfolded vCard lines
+        :rtype: Iterator[str]
         """
 
-        unfolded_local: list[str] = []
+        pending: str | None = None
+        # Whether the pending line is a TEL property, determined on its first
+        # continuation while it is still a single (short) physical line
+        pending_is_tel: bool | None = None
 
-        for ln in lines_list:
+        for ln in lines:
             if not ln:
                 continue
 
-            if ln[0] in (" ", "\t") and unfolded_local:
+            if ln[0] in (" ", "\t") and pending is not None:
                 cont = ln[1:]
 
                 if prop_pattern.match(cont):
-                    unfolded_local.append(cont)
+                    yield pending
+                    pending = cont
+                    pending_is_tel = None
                     continue
 
-                prev = unfolded_local[-1]
-                prev_key = prev.split(":", 1)[0]
-                prev_prop = prev_key.split(";", 1)[0].upper().strip()
+                if pending_is_tel is None:
+                    prev_key = pending.split(":", 1)[0]
+                    prev_prop = prev_key.split(";", 1)[0].upper().strip()
+                    pending_is_tel = prev_prop == "TEL"
 
-                if prev_prop == "TEL":
-                    unfolded_local[-1] += cont
+                if pending_is_tel:
+                    pending += cont
                 else:
-                    if not prev.endswith(" ") and not cont.startswith(" "):
-                        unfolded_local[-1] += " " + cont
+                    if not pending.endswith(" ") and not cont.startswith(" "):
+                        pending += " " + cont
                     else:
-                        unfolded_local[-1] += cont
+                        pending += cont
             else:
-                unfolded_local.append(ln)
+                if pending is not None:
+                    yield pending
+
+                pending = ln
+                pending_is_tel = None
 
-        return unfolded_local
+        if pending is not None:
+            yield pending
+
+    @staticmethod
+    def _unfold_lines(
+        lines_list: list[str], prop_pattern: re.Pattern[str] = _PROP_RE
+    ) -> list[str]:
+        """
+        Unfolds folded lines in a vCard according to RFC 6350.
+
+        :param lines_list: List of vCard lines
+        :type lines_list: list[str]
+        :param prop_pattern: Compiled regex pattern to identify property lines (default: _PROP_RE)
+        :type prop_pattern: re.Pattern[str]
+        :return: List of unfolded vCard lines
+        :rtype: list[str]
+        """
+
+        return list(
+            NextcloudWebDAVClient._iter_unfolded_lines(lines_list, prop_pattern)
+        )
 
     @staticmethod
     def _parse_vcard(vcard: str) -> tuple[str, list[tuple[str, list[str]]]]:
@@ -220,11 +339,10 @@ class NextcloudWebDAVClient:
         :rtype: Tuple[str, List[Tuple[str, List[str]]]]
         """
 
-        # Normalize line endings and split
-        lines = vcard.replace("\r\n", "\n").replace("\r", "\n").split("\n")
-        prop_pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")  # matches "PROP[:|;...]"
+        # Split on any line ending (CRLF, LF, CR) in a single pass
+        lines = vcard.splitlines()
 
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, prop_pattern)
+        unfolded = NextcloudWebDAVClient._iter_unfolded_lines(lines)
 
         name = "Unknown"
         numbers: list[tuple[str, list[str]]] = []
@@ -232,12 +350,30 @@ class NextcloudWebDAVClient:
         fn_value = None
 
         for line in unfolded:
-            if ":" not in line:
+            colon = line.find(":")
+
+            if colon == -1:
                 continue
 
-            key, value = line.split(":", 1)
+            key = line[:colon]
             prop = key.split(";", 1)[0].upper().strip()
 
+            # Skip everything else (e.g. PHOTO) before copying its value
+            if prop not in _VCARD_PROPS:
+                continue
+
+            value = line[colon + 1 :]
+
+            # TEL first, a contact usually has more numbers than names
+            if prop == "TEL":
+                val = value.strip()
+
+                if val:
+                    types = NextcloudWebDAVClient._extract_tel_types(key)
+                    numbers.append((val, types))
+
+                continue
+
             if prop == "FN":
                 fn_value = value.strip() or "Unknown"
 
@@ -249,17 +385,6 @@ class NextcloudWebDAVClient:
                 if len(parts) >= 4 and parts[3].strip():
                     prefix = parts[3].strip()
 
-                continue
-
-            if prop == "TEL":
-                val = value.strip()
-
-                if not val:
-                    continue
-
-                types = NextcloudWebDAVClient._extract_tel_types(key)
-                numbers.append((val, types))
-
         if fn_value:
             name = fn_value
 
@@ -268,114 +393,349 @@ class NextcloudWebDAVClient:
 
         return name, numbers
 
-    def download_all_contacts(self) -> list[str]:
+    def iter_all_contacts(self) -> Iterator[str]:
         """
-        Downloads all contacts as vCard strings.
+        Downloads all contacts and yields them as vCard strings while the response
+        is being parsed.
 
-        :return: List of vCard strings
-        :rtype: List[str]
+        :return: Iterator over vCard strings
+        :rtype: Iterator[str]
         """
 
         # Perform a single CardDAV REPORT to fetch all vCards in one request
-        body = """<?xml version="1.0"?>
-        <C:addressbook-query xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:carddav">
-            <D:prop>
-                <D:getetag/>
-                <C:address-data/>
-            </D:prop>
-            <C:filter/>
-        </C:addressbook-query>
-        """
+        headers = {
+            "Content-Type": 'application/xml; charset="utf-8"',
+            "Depth": "1",
+        }
+
+        # Closing the response returns the connection to the pool, also when
+        # parsing fails or the generator is not consumed to the end
+        with self.session.request(
+            method="REPORT",
+            url=self.base_url,
+            data=_ADDRESSBOOK_QUERY,
+            headers=headers,
+            stream=True,
+            verify=self.verify,
+        ) as resp:
+            resp.raise_for_status()
+
+            # Parse the multistatus response while it is being received, instead of
+            # decoding it to a string and building the full tree first.
+            # defusedxml rejects entity declarations and external references.
+            # Let urllib3 undo any Content-Encoding (gzip, deflate) on the fly.
+            resp.raw.decode_content = True
+            root = None
 
-        self.session.headers.update({"User-Agent": self._get_user_agent()})
+            for event, elem in ET.iterparse(resp.raw, events=("start", "end")):
+                if root is None:
+                    root = elem
+
+                if event == "start":
+                    continue
+
+                if elem.tag == _CARDDAV_ADDRESS_DATA:
+                    if elem.text:
+                        yield elem.text
+                elif elem.tag == _DAV_RESPONSE:
+                    # Detach every finished response from the document root, so the
+                    # tree never holds more than the response being parsed
+                    root.clear()
+
+    def _sync_collection(
+        self, sync_token: str
+    ) -> tuple[str, dict[str, tuple[str, list[tuple[str, list[str]]]] | None], bool]:
+        """
+        Fetches the vCards changed since the given sync-token and parses them.
+
+        :param sync_token: Sync-token of the previous sync (empty for a full sync)
+        :type sync_token: str
+        :return: Tuple of the new sync-token, a mapping of href to the parsed
+            contact (None for deleted vCards) and whether the server truncated the
+            result
+        :rtype: tuple[str, dict[str, tuple[str, list[tuple[str, list[str]]]] | None], bool]
+        """
 
         headers = {
             "Content-Type": 'application/xml; charset="utf-8"',
-            "Depth": "1",
+            "Depth": "0",
         }
-        resp = self.session.request(
+        with self.session.request(
             method="REPORT",
             url=self.base_url,
-            data=body.encode("utf-8"),
+            data=_SYNC_COLLECTION.format(sync_token=escape(sync_token)).encode("utf-8"),
             headers=headers,
+            stream=True,
             verify=self.verify,
-        )
+        ) as resp:
+            resp.raise_for_status()
+
+            resp.raw.decode_content = True
+            root = None
+            new_token = ""
+            changes: dict[str, tuple[str, list[tuple[str, list[str]]]] | None] = {}
+            truncated = False
+            collection = unquote(urlsplit(self.base_url).path).rstrip("/")
 
-        resp.raise_for_status()
+            for event, elem in ET.iterparse(resp.raw, events=("start", "end")):
+                if root is None:
+                    root = elem
+
+                if event == "start":
+                    continue
 
-        root = ET.fromstring(resp.text)
-        vcards = []
+                if elem.tag == _DAV_RESPONSE:
+                    href = elem.findtext(_DAV_HREF)
 
-        for response in root.findall(".//{DAV:}response"):
-            addrdata = response.find(".//{urn:ietf:params:xml:ns:carddav}address-data")
+                    if href:
+                        status = elem.findtext(_DAV_STATUS) or ""
 
-            if addrdata is not None and addrdata.text:
-                vcards.append(addrdata.text)
+                        # A truncated result is reported with a 507 status on the
+                        # collection itself (RFC 6578, section 3.6)
+                        if " 507 " in status:
+                            if unquote(urlsplit(href).path).rstrip("/") == collection:
+                                truncated = True
+                        # Deleted vCards are reported with a 404 status
+                        elif " 404 " in status:
+                            changes[href] = None
+                        else:
+                            vcard = elem.findtext(_PROPSTAT_ADDRESS_DATA)
 
-        return vcards
+                            # Only the name and the numbers are kept, not the vCard
+                            if vcard:
+                                changes[href] = self._parse_vcard(vcard)
+
+                    root.clear()
+                elif elem.tag == _DAV_SYNC_TOKEN and elem.text:
+                    new_token = elem.text.strip()
+
+        return new_token, changes, truncated
+
+    def sync_contacts(
+        self, cache_path: str
+    ) -> list[tuple[str, list[tuple[str, list[str]]]]]:
+        """
+        Synchronizes the contacts with a local cache and returns all contacts with
+        phone numbers.
+
+        The cache keeps the parsed contacts (name and phone numbers) and the
+        sync-token of the last run, so only vCards added, changed or deleted since
+        then are transferred. Without a (valid) cache, or with a cache of another
+        address book, all vCards are downloaded.
+
+        :param cache_path: Path to the JSON cache file
+        :type cache_path: str
+        :return: List of (full name, list of (number, [types])) tuples
+        :rtype: List[Tuple[str, List[Tuple[str, List[str]]]]]
+        """
+
+        cache_file = Path(cache_path)
+        sync_token = ""
+        contacts: dict[str, tuple[str, list[tuple[str, list[str]]]]] = {}
+
+        if cache_file.exists():
+            try:
+                cache = json.loads(cache_file.read_text(encoding="utf-8"))
+                sync_token = cache["sync_token"]
+                cached_contacts = cache["contacts"]
+
+                if not isinstance(sync_token, str) or not isinstance(
+                    cached_contacts, dict
+                ):
+                    raise TypeError("Unexpected contacts cache structure")
+
+                # JSON has no tuples, restore the shape returned by _parse_vcard
+                contacts = {
+                    href: (name, [(number, types) for number, types in tels])
+                    for href, (name, tels) in cached_contacts.items()
+                }
+
+                # A sync-token is only valid for the collection it was issued for
+                if cache["base_url"] != self.base_url:
+                    logger.info(
+                        "Contacts cache belongs to another address book, "
+                        "downloading all contacts."
+                    )
+
+                    sync_token = ""
+                    contacts = {}
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Ignoring invalid contacts cache: %s", cache_file)
+
+                sync_token = ""
+                contacts = {}
+
+        requested_token = sync_token
+
+        try:
+            sync_token, changes, truncated = self._sync_collection(sync_token)
+        except requests.HTTPError as exc:
+            # The server no longer accepts the sync-token, start over
+            if not sync_token or exc.response is None:
+                raise
+
+            if exc.response.status_code not in (403, 409):
+                raise
+
+            logger.info("Sync-token expired, downloading all contacts.")
+
+            contacts = {}
+            requested_token = ""
+            sync_token, changes, truncated = self._sync_collection("")
+
+        # The server may split the changes over several responses, continue with
+        # the returned sync-token until it reports the result as complete
+        while truncated:
+            # Without a new sync-token, the next request would return the same part
+            if sync_token == requested_token:
+                raise RuntimeError(
+                    "Server did not advance the sync-token of a truncated result: "
+                    f"{sync_token!r}"
+                )
+
+            requested_token = sync_token
+            sync_token, more_changes, truncated = self._sync_collection(sync_token)
+            changes.update(more_changes)
+
+        for href, contact in changes.items():
+            # Contacts without phone numbers never make it into the directory
+            if contact is None or not contact[1]:
+                contacts.pop(href, None)
+            else:
+                contacts[href] = contact
+
+        logger.info("Synchronized %d changed contacts.", len(changes))
+
+        cache_file.write_text(
+            json.dumps(
+                {
+                    "base_url": self.base_url,
+                    "sync_token": sync_token,
+                    "contacts": contacts,
+                }
+            ),
+            encoding="utf-8",
+        )
+
+        return list(contacts.values())
+
+    def download_all_contacts(self) -> list[str]:
+        """
+        Downloads all contacts as vCard strings.
+
+        :return: List of vCard strings
+        :rtype: List[str]
+        """
+
+        return list(self.iter_all_contacts())
 
     def create_gequdio_contact_xml(
-        self, vcard_list: list[str], write_path: str | None = None
+        self, vcard_list: Iterable[str], write_path: str | None = None
     ) -> str:
         """
-        Creates GEQUDIO contact XML from a list of vCard strings.
+        Creates GEQUDIO contact XML from vCard strings.
+
+        Each vCard is parsed as soon as it is taken from vcard_list, so an
+        iterator (e.g. from iter_all_contacts) is consumed without keeping the
+        vCard strings around.
 
-        :param vcard_list: List of vCard strings
-        :type vcard_list: List[str]
+        :param vcard_list: vCard strings (list or iterator)
+        :type vcard_list: Iterable[str]
         :param write_path: Optional path to write the XML file
         :type write_path: Optional[str]
         :return: GEQUDIO contact XML string
         :rtype: str
         """
 
-        root_node = ET.Element("GEQUDIODirectory")
+        # Empty vCards are of no use in a phone directory, skip them unparsed
+        return self.create_gequdio_contact_xml_from_parsed(
+            map(self._parse_vcard, filter(None, vcard_list)), write_path=write_path
+        )
 
-        # Sort contacts by full name (case-insensitive) before processing
-        for vcard in sorted(vcard_list, key=lambda v: self._parse_vcard(v)[0].lower()):
-            contact_name, tels = self._parse_vcard(vcard)
+    def create_gequdio_contact_xml_from_parsed(
+        self,
+        contacts: Iterable[tuple[str, list[tuple[str, list[str]]]]],
+        write_path: str | None = None,
+    ) -> str:
+        """
+        Creates GEQUDIO contact XML from parsed contacts (e.g. from sync_contacts).
 
-            contact_node = ET.SubElement(root_node, "DirectoryEntry")
-            ET.SubElement(contact_node, "Name").text = contact_name
+        :param contacts: (full name, list of (number, [types])) tuples
+        :type contacts: Iterable[Tuple[str, List[Tuple[str, List[str]]]]]
+        :param write_path: Optional path to write the XML file
+        :type write_path: Optional[str]
+        :return: GEQUDIO contact XML string
+        :rtype: str
+        """
+
+        # Sort by full name (case-insensitive). Contacts without phone numbers
+        # are of no use in a phone directory, drop them before sorting.
+        parsed = [(contact_name, tels) for contact_name, tels in contacts if tels]
+        parsed.sort(key=lambda contact: contact[0].lower())
+
+        # The output schema is flat and fixed, so the XML is assembled directly
+        # instead of building (and then serializing) an ElementTree
+        parts = ['<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n']
+        parts.append("<GEQUDIODirectory>" if parsed else "<GEQUDIODirectory />")
 
-            print(
-                f"Processing contact: {contact_name} with {len(tels)} telephone entries."
+        for contact_name, tels in parsed:
+            parts.append(f"<DirectoryEntry><Name>{escape(contact_name)}</Name>")
+
+            logger.debug(
+                "Processing contact: %s with %d telephone entries.",
+                contact_name,
+                len(tels),
             )
 
+            # Ensure all possible nodes exist (empty ones stay empty) and keep track
+            # of the latest node per tag. Nodes are [tag, number] pairs.
+            nodes: list[list[str]] = [
+                [_tag, ""] for _tag in ("Telephone", "Mobile", "Other")
+            ]
+            slots: dict[str, list[str]] = {node[0]: node for node in nodes}
+
             for number, types in tels:
+                # Normalize international prefix and remove non-numeric characters except '*'
+                if number.startswith("+"):
+                    number = "00" + number[1:]
+
+                number = _NONDIGIT_RE.sub("", number)
+
+                # Nothing left to dial (e.g. "ext"), do not take a node for it
+                if not number:
+                    continue
+
+                # Types are already normalized by _extract_tel_types
                 tag = next(
                     (
                         group
-                        for group, keywords in (
-                            # GEQUDIO sees "Telephone" as "Office", so map accordingly here
-                            ("Telephone", {"work", "desk", "office"}),
-                            ("Mobile", {"cell", "mobile"}),
-                        )
-                        if {t.strip().lower() for t in types} & keywords
+                        for group, keywords in _TEL_TYPE_GROUPS
+                        if not keywords.isdisjoint(types)
                     ),
                     "Other",
                 )
 
-                # Ensure all possible nodes exist (create empty ones if missing)
-                for _tag in ("Telephone", "Mobile", "Other"):
-                    if contact_node.find(_tag) is None:
-                        ET.SubElement(contact_node, _tag)
+                node = slots[tag]
+                if node[1]:
+                    node = [tag, ""]
+                    slots[tag] = node
+                    nodes.append(node)
 
-                el = contact_node.find(tag)
-                if el is None or el.text:
-                    el = ET.SubElement(contact_node, tag)
+                node[1] = number
 
-                # Normalize international prefix and remove non-numeric characters except '*'
-                number = re.sub(r"^\+", "00", number)
-                number = re.sub(r"[^0-9*]+", "", number)
+            # Normalized numbers only consist of digits and '*', no escaping needed
+            for tag, number in nodes:
+                parts.append(f"<{tag}>{number}</{tag}>" if number else f"<{tag} />")
 
-                el.text = number
+            parts.append("</DirectoryEntry>")
 
-        xml_body = ET.tostring(root_node, encoding="utf-8").decode("utf-8")
-        xml_str = (
-            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
-            + xml_body
-            + "\n"
-        )
+        if parsed:
+            parts.append("</GEQUDIODirectory>")
+
+        logger.info("Processed %d contacts.", len(parsed))
+
+        parts.append("\n")
+        xml_str = "".join(parts)
 
         if write_path:
             Path(write_path).write_text(xml_str, encoding="utf-8")
@@ -391,6 +751,8 @@ def main():
     :rtype:
     """
 
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # The first entry in sys.path is usually the python executable directory in the venv.
     venv_path = sys.path[0]
     if venv_path.endswith(os.path.sep + "bin"):
@@ -407,11 +769,13 @@ def main():
         addressbook=cfg["addressbook"],
         # verify_ssl=cfg["verify_ssl"],
     )
-    contacts = client.download_all_contacts()
 
-    print(f"Fetched {len(contacts)} contacts from Nextcloud.\n")
+    # Only transfer the vCards changed since the last run
+    contacts = client.sync_contacts(
+        cache_path=str(Path(venv_path).parent / "gequdio-cache.json")
+    )
 
-    client.create_gequdio_contact_xml(
+    client.create_gequdio_contact_xml_from_parsed(
         contacts, write_path=str(Path(venv_path).parent / "gequdio.xml")
     )
 
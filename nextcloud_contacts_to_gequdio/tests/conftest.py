@@ -0,0 +1,41 @@
+# Third Party
+import pytest
+
+# Nextcloud Contacts to GEQUDIO
+from nextcloud_contacts_to_gequdio.nextcloud_to_gequdio import NextcloudWebDAVClient
+
+
+@pytest.fixture(scope="module")
+def shared_client():
+    """
+    NextcloudWebDAVClient shared by all tests of a module.
+
+    :return:
+    :rtype:
+    """
+
+    return NextcloudWebDAVClient(
+        url="https://example.com",
+        username="user",
+        password="pass",
+        addressbook="contacts",
+    )
+
+
+@pytest.fixture
+def client(shared_client):
+    """
+    The shared NextcloudWebDAVClient. Tests replace its session with a stub where
+    needed, the original session is restored afterwards.
+
+    :param shared_client:
+    :type shared_client:
+    :return:
+    :rtype:
+    """
+
+    session = shared_client.session
+
+    yield shared_client
+
+    shared_client.session = session
@@ -1,36 +1,108 @@
 # Standard Library
-import re
+import configparser
+import functools
+import io
+import json
+import logging
+import textwrap
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from unittest.mock import ANY, MagicMock, Mock, patch
+from unittest.mock import ANY, MagicMock, patch
+from xml.sax.saxutils import escape
 
 # Third Party
 import pytest
 import requests
+from defusedxml import EntitiesForbidden
 
 # Nextcloud Contacts to GEQUDIO
 from nextcloud_contacts_to_gequdio import __version__
 from nextcloud_contacts_to_gequdio.nextcloud_to_gequdio import (
+    _PROP_RE,
     NextcloudWebDAVClient,
     load_settings,
+    load_settings_from_config,
     main,
 )
 
+# CardDAV multistatus response that _multistatus() cannot build: a response
+# whose prop has no address-data element
+_XML_NO_ADDRESS_DATA = textwrap.dedent("""\
+    <multistatus xmlns="DAV:">
+        <response>
+            <propstat>
+                <prop>
+                </prop>
+            </propstat>
+        </response>
+    </multistatus>
+    """).encode("utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def _multistatus(
+    responses: tuple[tuple[str, str | None], ...],
+    sync_token: str | None = None,
+    truncated_href: str | None = None,
+) -> bytes:
+    """
+    Builds a CardDAV multistatus response body, cached per distinct input.
+
+    :param responses: (href, vCard) pairs, a vCard of None reports a deleted href
+    :type responses: tuple[tuple[str, str | None], ...]
+    :param sync_token: Optional sync-token to append
+    :type sync_token: str | None
+    :param truncated_href: Optional collection href to report as truncated
+    :type truncated_href: str | None
+    :return: Response body
+    :rtype: bytes
+    """
+
+    parts = ['<multistatus xmlns="DAV:" xmlns:C="urn:ietf:params:xml:ns:carddav">']
+
+    for href, vcard in responses:
+        if vcard is None:
+            parts.append(
+                f"<response><href>{href}</href>"
+                "<status>HTTP/1.1 404 Not Found</status></response>"
+            )
+        else:
+            parts.append(
+                f"<response><href>{href}</href><propstat><prop>"
+                f"<C:address-data>{escape(vcard)}</C:address-data></prop>"
+                "<status>HTTP/1.1 200 OK</status></propstat></response>"
+            )
+
+    if truncated_href is not None:
+        parts.append(
+            f"<response><href>{truncated_href}</href>"
+            "<status>HTTP/1.1 507 Insufficient Storage</status></response>"
+        )
+
+    if sync_token is not None:
+        parts.append(f"<sync-token>{sync_token}</sync-token>")
+
+    parts.append("</multistatus>")
+
+    return "".join(parts).encode("utf-8")
+
 
 class TestLoadSettings:
     """
     Test cases for the load_settings function.
     """
 
-    def test_loads_settings_returns_correct_values_for_valid_ini(self):
+    def test_loads_settings_returns_correct_values_for_valid_ini(self, tmp_path):
         """
         Test that load_settings returns correct values for a valid INI file.
 
+        :param tmp_path:
+        :type tmp_path:
         :return:
         :rtype:
         """
 
-        valid_ini = Path("valid.ini")
+        valid_ini = tmp_path / "valid.ini"
         valid_ini.write_text(
             "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\naddressbook=my_contacts\nverify_ssl=False"
         )
@@ -43,1130 +115,1534 @@ class TestLoadSettings:
         assert result["addressbook"] == "my_contacts"
         assert result["verify_ssl"] is False
 
-        valid_ini.unlink()
-
-    def test_loads_settings_uses_default_addressbook_when_missing(self):
+    def test_loads_settings_reads_percent_sign_literally(self, tmp_path):
         """
-        Test that load_settings uses default addressbook when missing.
+        Test that load_settings does not treat "%" in a value as interpolation.
 
+        :param tmp_path:
+        :type tmp_path:
         :return:
         :rtype:
         """
 
-        default_ini = Path("default.ini")
-        default_ini.write_text(
-            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\nverify_ssl=True"
+        percent_ini = tmp_path / "percent.ini"
+        percent_ini.write_text(
+            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=50%off%(x)s"
         )
 
-        result = load_settings(str(default_ini))
-
-        assert result["addressbook"] == "contacts"
-
-        default_ini.unlink()
-
-    def test_loads_settings_raises_file_not_found_for_nonexistent_file(self):
-        """
-        Test that load_settings raises FileNotFoundError for nonexistent file.
-
-        :return:
-        :rtype:
-        """
+        result = load_settings(str(percent_ini))
 
-        with pytest.raises(FileNotFoundError):
-            load_settings("nonexistent.ini")
+        assert result["password"] == "50%off%(x)s"
 
-    def test_loads_settings_raises_key_error_for_missing_nextcloud_section(self):
+    def test_loads_settings_reads_escaped_percent_sign_literally(self, tmp_path):
         """
-        Test that load_settings raises KeyError for missing nextcloud section.
+        Test that load_settings reads "%%" as two characters, it is no longer an
+        escaped "%".
 
+        :param tmp_path:
+        :type tmp_path:
         :return:
         :rtype:
         """
 
-        invalid_ini = Path("invalid.ini")
-        invalid_ini.write_text("[wrong_section]\nkey=value")
+        percent_ini = tmp_path / "percent.ini"
+        percent_ini.write_text(
+            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=50%%off"
+        )
 
-        with pytest.raises(KeyError):
-            load_settings(str(invalid_ini))
+        result = load_settings(str(percent_ini))
 
-        invalid_ini.unlink()
+        assert result["password"] == "50%%off"
 
-    def test_loads_settings_sets_default_addressbook_when_empty(self):
+    def test_loads_settings_raises_file_not_found_for_nonexistent_file(self, tmp_path):
         """
-        Test that load_settings sets default addressbook when empty.
+        Test that load_settings raises FileNotFoundError for nonexistent file.
 
+        :param tmp_path:
+        :type tmp_path:
         :return:
         :rtype:
         """
 
-        empty_ini = Path("empty_addressbook.ini")
-        empty_ini.write_text(
-            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\naddressbook=\nverify_ssl=True"
-        )
-
-        result = load_settings(str(empty_ini))
-
-        assert result["addressbook"] == "contacts"
-
-        empty_ini.unlink()
+        with pytest.raises(FileNotFoundError):
+            load_settings(str(tmp_path / "nonexistent.ini"))
 
-    def test_loads_settings_preserves_provided_addressbook(self):
+    def test_loads_settings_raises_key_error_for_missing_nextcloud_section(
+        self, tmp_path
+    ):
         """
-        Test that load_settings preserves provided addressbook.
+        Test that load_settings raises KeyError for missing nextcloud section.
 
+        :param tmp_path:
+        :type tmp_path:
         :return:
         :rtype:
         """
 
-        custom_ini = Path("custom_addressbook.ini")
-        custom_ini.write_text(
-            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\naddressbook=my_contacts\nverify_ssl=True"
-        )
-
-        result = load_settings(str(custom_ini))
-
-        assert result["addressbook"] == "my_contacts"
+        invalid_ini = tmp_path / "invalid.ini"
+        invalid_ini.write_text("[wrong_section]\nkey=value")
 
-        custom_ini.unlink()
+        with pytest.raises(KeyError):
+            load_settings(str(invalid_ini))
 
 
-class TestNextcloudWebDAVClientHelperGetUserAgent:
+class TestLoadSettingsFromConfig:
     """
-    Test cases for the NextcloudWebDAVClient._get_user_agent method.
+    Test cases for the load_settings_from_config function.
     """
 
-    def test_user_agent_contains_correct_app_version(self):
+    def test_load_settings_from_config_uses_default_addressbook_when_missing(self):
         """
-        Test that the user agent contains the correct application version.
+        Test that load_settings_from_config uses default addressbook when missing.
 
         :return:
         :rtype:
         """
 
-        result = NextcloudWebDAVClient._get_user_agent()
-
-        assert f"NextcloudContactsToGEQUDIO/{__version__}" in result
-
-    def test_user_agent_contains_correct_requests_version(self):
-        """
-        Test that the user agent contains the correct requests library version.
-
-        :return:
-        :rtype:
-        """
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string(
+            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\nverify_ssl=True"
+        )
 
-        result = NextcloudWebDAVClient._get_user_agent()
+        result = load_settings_from_config(config)
 
-        assert f"python-requests/{requests.__version__}" in result
+        assert result["addressbook"] == "contacts"
 
-    def test_user_agent_contains_correct_repository_url(self):
+    def test_load_settings_from_config_sets_default_addressbook_when_empty(self):
         """
-        Test that the user agent contains the correct repository URL.
+        Test that load_settings_from_config sets default addressbook when empty.
 
         :return:
         :rtype:
         """
 
-        result = NextcloudWebDAVClient._get_user_agent()
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string(
+            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\naddressbook=\nverify_ssl=True"
+        )
 
-        assert "+https://github.com/ppfeufer/nextcloud-contacts-to-gequdio" in result
+        result = load_settings_from_config(config)
 
+        assert result["addressbook"] == "contacts"
 
-class TestNextcloudWebDAVClientInit:
-    def test_nextcloud_client_initializes_with_valid_settings(self):
+    def test_load_settings_from_config_preserves_provided_addressbook(self):
         """
-        Test that NextcloudWebDAVClient initializes with valid settings.
+        Test that load_settings_from_config preserves provided addressbook.
 
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient("url", "user", "pass")
-
-        assert client.base_url.endswith("contacts/")
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string(
+            "[nextcloud]\nurl=https://example.com\nuser=test_user\npassword=test_pass\naddressbook=my_contacts\nverify_ssl=True"
+        )
 
+        result = load_settings_from_config(config)
 
-class TestNextcloudWebDAVClientHelperParseVCard:
-    """
-    Test cases for the NextcloudWebDAVClient._parse_vcard method.
-    """
+        assert result["addressbook"] == "my_contacts"
 
-    def test_parse_vcard_handles_vcard_with_no_properties(self):
+    def test_load_settings_from_config_names_source_in_missing_section_error(self):
         """
-        Test that _parse_vcard handles a vCard with no properties.
+        Test that load_settings_from_config names the source when the nextcloud
+        section is missing.
 
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+        config = configparser.ConfigParser(interpolation=None)
+        config.read_string("[wrong_section]\nkey=value")
 
-        assert name == "Unknown"
-        assert numbers == []
+        with pytest.raises(KeyError, match="my.ini"):
+            load_settings_from_config(config, source="my.ini")
 
-    def test_parse_vcard_handles_vcard_with_only_whitespace(self):
-        """
-        Test that _parse_vcard handles a vCard with only whitespace.
 
-        :return:
-        :rtype:
-        """
+# Parts expected in the User-Agent string
+_APP_TAG = f"NextcloudContactsToGEQUDIO/{__version__}"
+_REQUESTS_TAG = f"python-requests/{requests.__version__}"
+_REPOSITORY_TAG = "+https://github.com/ppfeufer/nextcloud-contacts-to-gequdio"
 
-        vcard = "BEGIN:VCARD\n   \nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
 
-        assert name == "Unknown"
-        assert numbers == []
+@pytest.fixture(scope="module")
+def user_agent():
+    """
+    User-Agent string of the NextcloudWebDAVClient, built once for the module.
 
-    def test_parse_vcard_handles_vcard_with_invalid_property_format(self):
-        """
-        Test that _parse_vcard handles a vCard with invalid property format.
+    :return:
+    :rtype:
+    """
 
-        :return:
-        :rtype:
-        """
+    return NextcloudWebDAVClient._get_user_agent()
 
-        vcard = "BEGIN:VCARD\nINVALID_PROPERTY\nFN:John Doe\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
 
-        assert name == "John Doe"
-        assert numbers == []
+class TestNextcloudWebDAVClientHelperGetUserAgent:
+    """
+    Test cases for the NextcloudWebDAVClient._get_user_agent method.
+    """
 
-    def test_parse_vcard_handles_vcard_with_multiple_folded_properties(self):
+    def test_user_agent_contains_correct_app_version(self, user_agent):
         """
-        Test that _parse_vcard handles a vCard with multiple folded properties.
+        Test that the user agent contains the correct application version.
 
+        :param user_agent:
+        :type user_agent:
         :return:
         :rtype:
         """
 
-        vcard = (
-            "BEGIN:VCARD\nFN:John\n Doe\nTEL;TYPE=HOME:123\n 456789\n"
-            "TEL;TYPE=CELL:987\n 654321\nEND:VCARD"
-        )
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home"]), ("987654321", ["cell"])]
+        assert _APP_TAG in user_agent
 
-    def test_parse_vcard_handles_vcard_with_empty_tel_property(self):
+    def test_user_agent_contains_correct_requests_version(self, user_agent):
         """
-        Test that _parse_vcard handles a vCard with an empty TEL property.
+        Test that the user agent contains the correct requests library version.
 
+        :param user_agent:
+        :type user_agent:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL:\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "John Doe"
-        assert numbers == []
+        assert _REQUESTS_TAG in user_agent
 
-    def test_parse_vcard_handles_vcard_with_tel_property_without_value(self):
+    def test_user_agent_contains_correct_repository_url(self, user_agent):
         """
-        Test that _parse_vcard handles a vCard with a TEL property without value.
+        Test that the user agent contains the correct repository URL.
 
+        :param user_agent:
+        :type user_agent:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME:\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+        assert _REPOSITORY_TAG in user_agent
 
-        assert name == "John Doe"
-        assert numbers == []
 
-    def test_parse_vcard_handles_vcard_with_duplicate_properties(self):
-        """
-        Test that _parse_vcard handles a vCard with duplicate properties.
+class StubResponse:
+    """
+    Minimal stand-in for a streamed requests.Response.
+    """
 
-        :return:
-        :rtype:
-        """
+    __slots__ = ("raw", "status_code", "closed")
 
-        vcard = (
-            "BEGIN:VCARD\nFN:John Doe\nFN:Jane Doe\n"
-            "TEL;TYPE=HOME:123456789\nTEL;TYPE=HOME:987654321\nEND:VCARD"
-        )
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+    def __init__(self, body: bytes, status_code: int = 207):
+        self.raw = io.BytesIO(body)
+        self.status_code = status_code
+        self.closed = False
 
-        assert name == "Jane Doe"
-        assert numbers == [("123456789", ["home"]), ("987654321", ["home"])]
+    def __enter__(self):
+        return self
 
-    def test_parse_vcard_ignores_empty_lines(self):
-        """
-        Test that _parse_vcard ignores empty lines.
+    def __exit__(self, *args):
+        self.close()
 
-        :return:
-        :rtype:
-        """
+    def close(self):
+        self.closed = True
 
-        vcard = "BEGIN:VCARD\n\nFN:John Doe\n\nTEL:123456789\n\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(response=self)
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", [])]
 
-    def test_parse_vcard_handles_vcard_with_only_empty_lines(self):
-        """
-        Test that _parse_vcard handles a vCard with only empty lines.
+class StubSession:
+    """
+    Minimal stand-in for a requests.Session, returning the given responses in
+    order and recording the keyword arguments of every request.
+    """
 
-        :return:
-        :rtype:
-        """
+    __slots__ = ("responses", "calls")
 
-        vcard = "BEGIN:VCARD\n\n\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+    def __init__(self, *responses: StubResponse):
+        self.responses = list(responses)
+        self.calls: list[dict] = []
 
-        assert name == "Unknown"
-        assert numbers == []
+    def request(self, **kwargs) -> StubResponse:
+        self.calls.append(kwargs)
 
-    def test_parse_vcard_handles_continuation_as_new_property(self):
-        """
-        Test that _parse_vcard handles continuation as a new property.
+        return self.responses.pop(0)
 
-        :return:
-        :rtype:
-        """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\n TEL;TYPE=HOME:123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+@pytest.fixture
+def mocked_client(client):
+    """
+    Factory for the shared client with a stub session, whose REPORT request
+    returns the given response body.
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home"])]
+    :param client:
+    :type client:
+    :return:
+    :rtype:
+    """
 
-    def test_parse_vcard_handles_continuation_with_invalid_property(self):
-        """
-        Test that _parse_vcard handles continuation with an invalid property.
+    def _mocked_client(body: bytes) -> tuple[NextcloudWebDAVClient, StubSession]:
+        session = StubSession(StubResponse(body))
+        client.session = session
 
-        :return:
-        :rtype:
-        """
+        return client, session
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\n TELINVALID:123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+    return _mocked_client
 
-        assert name == "John Doe"
-        assert numbers == []
 
-    def test_parse_vcard_handles_continuation_with_mixed_properties(self):
+class TestNextcloudWebDAVClientInit:
+    def test_nextcloud_client_initializes_with_valid_settings(self):
         """
-        Test that _parse_vcard handles continuation with mixed properties.
+        Test that NextcloudWebDAVClient initializes with valid settings.
 
         :return:
         :rtype:
         """
 
-        vcard = (
-            "BEGIN:VCARD\nFN:John\n Doe\n TEL;TYPE=HOME:123\n 456789\n"
-            "TEL;TYPE=CELL:987\n 654321\nEND:VCARD"
-        )
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+        client = NextcloudWebDAVClient("url", "user", "pass")
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home"]), ("987654321", ["cell"])]
+        assert client.base_url.endswith("contacts/")
 
-    def test_parse_vcard_handles_single_type(self):
+    def test_nextcloud_client_quotes_username_and_addressbook_in_base_url(self):
         """
-        Test that _parse_vcard handles a single type.
+        Test that NextcloudWebDAVClient quotes the username and addressbook as URL
+        path segments.
 
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME:123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
+        client = NextcloudWebDAVClient(
+            "https://example.com/nextcloud/", "john doe", "pass", "work/#1"
+        )
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home"])]
+        assert client.base_url == (
+            "https://example.com/nextcloud/remote.php/dav/addressbooks/users/"
+            "john%20doe/work%2F%231/"
+        )
 
-    def test_parse_vcard_handles_multiple_types_with_whitespace_and_case(self):
+    def test_nextcloud_client_configures_session_once(self):
         """
-        Test that _parse_vcard handles multiple types with whitespace and case.
+        Test that NextcloudWebDAVClient sets the User-Agent on the session and keeps
+        the SSL verification setting when it is created.
 
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE= HOME , Work :123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home", "work"])]
-
-    def test_parse_vcard_handles_flag_style_type_parameter(self):
-        """
-        Test that _parse_vcard handles flag-style TYPE parameter.
+        client = NextcloudWebDAVClient("url", "user", "pass", verify_ssl=False)
 
-        :return:
-        :rtype:
-        """
+        assert (
+            client.session.headers["User-Agent"]
+            == NextcloudWebDAVClient._get_user_agent()
+        )
+        assert client.verify is False
+
+    def test_nextcloud_client_passes_ssl_verification_to_each_request(self):
+        """
+        Test that NextcloudWebDAVClient passes the SSL verification setting with
+        each request, so REQUESTS_CA_BUNDLE and CURL_CA_BUNDLE cannot override it.
+
+        :return:
+        :rtype:
+        """
+
+        client = NextcloudWebDAVClient("url", "user", "pass", verify_ssl=False)
+        client.session = StubSession(StubResponse(_multistatus(())))
+
+        client.download_all_contacts()
+
+        assert client.session.calls[-1]["verify"] is False
+
+
+# vCard strings with the expected result of NextcloudWebDAVClient._parse_vcard
+_VCARD_CASES = [
+    pytest.param(
+        "BEGIN:VCARD\nEND:VCARD",
+        "Unknown",
+        [],
+        id="handles_vcard_with_no_properties",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\n   \nEND:VCARD",
+        "Unknown",
+        [],
+        id="handles_vcard_with_only_whitespace",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nINVALID_PROPERTY\nFN:John Doe\nEND:VCARD",
+        "John Doe",
+        [],
+        id="handles_vcard_with_invalid_property_format",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John\n Doe\nTEL;TYPE=HOME:123\n 456789\n"
+        "TEL;TYPE=CELL:987\n 654321\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home"]), ("987654321", ["cell"])],
+        id="handles_vcard_with_multiple_folded_properties",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL:\nEND:VCARD",
+        "John Doe",
+        [],
+        id="handles_vcard_with_empty_tel_property",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME:\nEND:VCARD",
+        "John Doe",
+        [],
+        id="handles_vcard_with_tel_property_without_value",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nFN:Jane Doe\n"
+        "TEL;TYPE=HOME:123456789\nTEL;TYPE=HOME:987654321\nEND:VCARD",
+        "Jane Doe",
+        [("123456789", ["home"]), ("987654321", ["home"])],
+        id="handles_vcard_with_duplicate_properties",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\n\nFN:John Doe\n\nTEL:123456789\n\nEND:VCARD",
+        "John Doe",
+        [("123456789", [])],
+        id="ignores_empty_lines",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\n\n\nEND:VCARD",
+        "Unknown",
+        [],
+        id="handles_vcard_with_only_empty_lines",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\n TEL;TYPE=HOME:123456789\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home"])],
+        id="handles_continuation_as_new_property",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\n TELINVALID:123456789\nEND:VCARD",
+        "John Doe",
+        [],
+        id="handles_continuation_with_invalid_property",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John\n Doe\n TEL;TYPE=HOME:123\n 456789\n"
+        "TEL;TYPE=CELL:987\n 654321\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home"]), ("987654321", ["cell"])],
+        id="handles_continuation_with_mixed_properties",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME:123456789\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home"])],
+        id="handles_single_type",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE= HOME , Work :123456789\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home", "work"])],
+        id="handles_multiple_types_with_whitespace_and_case",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;HOME:123456789\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home"])],
+        id="handles_flag_style_type_parameter",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;PREF=1;TYPE=WORK:987654321\nEND:VCARD",
+        "John Doe",
+        [("987654321", ["work"])],
+        id="ignores_unrelated_parameters_and_extracts_type",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME=WORK:123456789\nEND:VCARD",
+        "John Doe",
+        [("123456789", ["home=work"])],
+        id="handles_invalid_type_format_preserving_raw_value",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;;Dr.;\nEND:VCARD",
+        "Dr. John Doe",
+        [],
+        id="parses_prefix_when_n_property_contains_valid_prefix",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:Jane Smith\nN:Smith;Jane;;;\nEND:VCARD",
+        "Jane Smith",
+        [],
+        id="ignores_prefix_when_n_property_is_empty",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:Emily Brown\nEND:VCARD",
+        "Emily Brown",
+        [],
+        id="handles_missing_n_property_gracefully",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;;  Dr.  ;\nEND:VCARD",
+        "Dr. John Doe",
+        [],
+        id="trims_whitespace_around_prefix_in_n_property",
+    ),
+    pytest.param(
+        "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;\nEND:VCARD",
+        "John Doe",
+        [],
+        id="ignores_n_property_with_insufficient_components",
+    ),
+]
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;HOME:123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home"])]
+class TestNextcloudWebDAVClientHelperParseVCard:
+    """
+    Test cases for the NextcloudWebDAVClient._parse_vcard method.
+    """
 
-    def test_parse_vcard_ignores_unrelated_parameters_and_extracts_type(self):
+    @pytest.mark.parametrize("vcard,expected_name,expected_numbers", _VCARD_CASES)
+    def test_parse_vcard(self, vcard, expected_name, expected_numbers):
         """
-        Test that _parse_vcard ignores unrelated parameters and extracts type.
+        Test that _parse_vcard extracts the full name and telephone numbers.
 
+        :param vcard:
+        :type vcard:
+        :param expected_name:
+        :type expected_name:
+        :param expected_numbers:
+        :type expected_numbers:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;PREF=1;TYPE=WORK:987654321\nEND:VCARD"
         name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
 
-        assert name == "John Doe"
-        assert numbers == [("987654321", ["work"])]
-
-    def test_parse_vcard_handles_invalid_type_format_preserving_raw_value(self):
-        """
-        Test that _parse_vcard handles invalid TYPE format preserving raw value.
-
-        :return:
-        :rtype:
-        """
+        assert name == expected_name
+        assert numbers == expected_numbers
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=HOME=WORK:123456789\nEND:VCARD"
-        name, numbers = NextcloudWebDAVClient._parse_vcard(vcard)
 
-        assert name == "John Doe"
-        assert numbers == [("123456789", ["home=work"])]
+class TestNextcloudWebDAVClientDownloadAllContacts:
+    """
+    Test cases for the NextcloudWebDAVClient.download_all_contacts method.
+    """
 
-    def test_parses_prefix_when_n_property_contains_valid_prefix(self):
+    def test_downloads_all_contacts_successfully(self, monkeypatch, mocked_client):
         """
-        Test that _parse_vcard parses prefix when N property contains a valid prefix.
+        Test that download_all_contacts successfully retrieves and parses contacts.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;;Dr.;\nEND:VCARD"
-        name, _ = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "Dr. John Doe"
-
-    def test_ignores_prefix_when_n_property_is_empty(self):
-        """
-        Test that _parse_vcard ignores prefix when N property is empty.
-
-        :return:
-        :rtype:
-        """
+        client, session = mocked_client(
+            _multistatus(
+                (
+                    ("/contact1.vcf", "BEGIN:VCARD\nFN:John Doe\nEND:VCARD"),
+                    ("/contact2.vcf", "BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD"),
+                )
+            )
+        )
 
-        vcard = "BEGIN:VCARD\nFN:Jane Smith\nN:Smith;Jane;;;\nEND:VCARD"
-        name, _ = NextcloudWebDAVClient._parse_vcard(vcard)
+        vcards = client.download_all_contacts()
 
-        assert name == "Jane Smith"
+        assert vcards == [
+            "BEGIN:VCARD\nFN:John Doe\nEND:VCARD",
+            "BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD",
+        ]
+        assert session.calls == [
+            {
+                "method": "REPORT",
+                "url": client.base_url,
+                "data": ANY,
+                "headers": ANY,
+                "stream": True,
+                "verify": True,
+            }
+        ]
 
-    def test_handles_missing_n_property_gracefully(self):
+    def test_handles_empty_addressbook_response(self, monkeypatch, mocked_client):
         """
-        Test that _parse_vcard handles missing N property gracefully.
+        Test that download_all_contacts handles an empty address book response.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:Emily Brown\nEND:VCARD"
-        name, _ = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "Emily Brown"
-
-    def test_trims_whitespace_around_prefix_in_n_property(self):
-        """
-        Test that _parse_vcard trims whitespace around prefix in N property.
-
-        :return:
-        :rtype:
-        """
+        client, session = mocked_client(_multistatus(()))
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;;  Dr.  ;\nEND:VCARD"
-        name, _ = NextcloudWebDAVClient._parse_vcard(vcard)
+        vcards = client.download_all_contacts()
 
-        assert name == "Dr. John Doe"
+        assert vcards == []
+        assert session.calls == [
+            {
+                "method": "REPORT",
+                "url": client.base_url,
+                "data": ANY,
+                "headers": ANY,
+                "stream": True,
+                "verify": True,
+            }
+        ]
 
-    def test_ignores_n_property_with_insufficient_components(self):
+    def test_handles_non_multistatus_xml_returns_empty_list(
+        self, monkeypatch, mocked_client
+    ):
         """
-        Test that _parse_vcard ignores N property with insufficient components.
+        Test that download_all_contacts handles non-multistatus XML and returns an empty list.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        vcard = "BEGIN:VCARD\nFN:John Doe\nN:Doe;John;\nEND:VCARD"
-        name, _ = NextcloudWebDAVClient._parse_vcard(vcard)
-
-        assert name == "John Doe"
+        client, _ = mocked_client("<invalid>XML</invalid>".encode("utf-8"))
 
+        vcards = client.download_all_contacts()
 
-class TestNextcloudWebDAVClientDownloadAllContacts:
-    """
-    Test cases for the NextcloudWebDAVClient.download_all_contacts method.
-    """
+        assert vcards == []
 
-    def test_downloads_all_contacts_successfully(self, monkeypatch):
+    def test_appends_vcard_text_when_address_data_is_present(
+        self, monkeypatch, mocked_client
+    ):
         """
-        Test that download_all_contacts successfully retrieves and parses contacts.
+        Test that download_all_contacts appends vCard text when address-data is present.
 
         :param monkeypatch:
         :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = """
-        <multistatus xmlns="DAV:">
-            <response>
-                <href>/contact1.vcf</href>
-                <propstat>
-                    <prop>
-                        <address-data xmlns="urn:ietf:params:xml:ns:carddav">BEGIN:VCARD\nFN:John Doe\nEND:VCARD</address-data>
-                    </prop>
-                </propstat>
-            </response>
-            <response>
-                <href>/contact2.vcf</href>
-                <propstat>
-                    <prop>
-                        <address-data xmlns="urn:ietf:params:xml:ns:carddav">BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD</address-data>
-                    </prop>
-                </propstat>
-            </response>
-        </multistatus>
-        """
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        client, _ = mocked_client(
+            _multistatus((("/contact1.vcf", "BEGIN:VCARD\nFN:John Doe\nEND:VCARD"),))
         )
-        client.session = mock_session
 
         vcards = client.download_all_contacts()
 
-        assert vcards == [
-            "BEGIN:VCARD\nFN:John Doe\nEND:VCARD",
-            "BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD",
-        ]
-        mock_session.request.assert_called_once_with(
-            method="REPORT",
-            url=client.base_url,
-            data=ANY,
-            headers=ANY,
-            verify=client.verify,
-        )
+        assert vcards == ["BEGIN:VCARD\nFN:John Doe\nEND:VCARD"]
 
-    def test_handles_empty_addressbook_response(self, monkeypatch):
+    def test_skips_vcard_when_address_data_is_missing(self, monkeypatch, mocked_client):
         """
-        Test that download_all_contacts handles an empty address book response.
+        Test that download_all_contacts skips vCard when address-data is missing.
 
         :param monkeypatch:
         :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = """
-        <multistatus xmlns="DAV:"></multistatus>
-        """
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
-        )
-        client.session = mock_session
+        client, _ = mocked_client(_multistatus((("/contact1.vcf", ""),)))
 
         vcards = client.download_all_contacts()
 
         assert vcards == []
-        mock_session.request.assert_called_once_with(
-            method="REPORT",
-            url=client.base_url,
-            data=ANY,
-            headers=ANY,
-            verify=client.verify,
-        )
 
-    def test_handles_non_multistatus_xml_returns_empty_list(self, monkeypatch):
+    def test_skips_vcard_when_address_data_tag_is_absent(
+        self, monkeypatch, mocked_client
+    ):
         """
-        Test that download_all_contacts handles non-multistatus XML and returns an empty list.
+        Test that download_all_contacts skips vCard when address-data tag is absent.
 
         :param monkeypatch:
         :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = "<invalid>XML</invalid>"
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
-        )
-        client.session = mock_session
+        client, _ = mocked_client(_XML_NO_ADDRESS_DATA)
 
         vcards = client.download_all_contacts()
 
         assert vcards == []
 
-    def test_appends_vcard_text_when_address_data_is_present(self, monkeypatch):
+    def test_rejects_entity_declarations_in_response(self, mocked_client):
         """
-        Test that download_all_contacts appends vCard text when address-data is present.
+        Test that download_all_contacts refuses to expand XML entities.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = """
-        <multistatus xmlns="DAV:">
-            <response>
-                <propstat>
-                    <prop>
-                        <address-data xmlns="urn:ietf:params:xml:ns:carddav">BEGIN:VCARD\nFN:John Doe\nEND:VCARD</address-data>
-                    </prop>
-                </propstat>
-            </response>
-        </multistatus>
-        """
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        client, session = mocked_client(
+            b'<?xml version="1.0"?>'
+            b'<!DOCTYPE multistatus [<!ENTITY lol "lol">]>'
+            b'<multistatus xmlns="DAV:">&lol;</multistatus>'
         )
-        client.session = mock_session
+        response = session.responses[0]
 
-        vcards = client.download_all_contacts()
+        with pytest.raises(EntitiesForbidden):
+            client.download_all_contacts()
 
-        assert vcards == ["BEGIN:VCARD\nFN:John Doe\nEND:VCARD"]
+        assert response.closed
 
-    def test_skips_vcard_when_address_data_is_missing(self, monkeypatch):
+    def test_iter_all_contacts_yields_vcards_lazily(self, mocked_client):
         """
-        Test that download_all_contacts skips vCard when address-data is missing.
+        Test that iter_all_contacts only sends the request once iteration starts
+        and yields the vCards one by one.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = """
-        <multistatus xmlns="DAV:">
-            <response>
-                <propstat>
-                    <prop>
-                        <address-data xmlns="urn:ietf:params:xml:ns:carddav"></address-data>
-                    </prop>
-                </propstat>
-            </response>
-        </multistatus>
-        """
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        client, session = mocked_client(
+            _multistatus(
+                (
+                    ("/1.vcf", "BEGIN:VCARD\nFN:John Doe\nEND:VCARD"),
+                    ("/2.vcf", "BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD"),
+                )
+            )
         )
-        client.session = mock_session
 
-        vcards = client.download_all_contacts()
+        vcards = client.iter_all_contacts()
 
-        assert vcards == []
+        assert session.calls == []
+        assert next(vcards) == "BEGIN:VCARD\nFN:John Doe\nEND:VCARD"
+        assert list(vcards) == ["BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD"]
+        assert len(session.calls) == 1
 
-    def test_skips_vcard_when_address_data_tag_is_absent(self, monkeypatch):
+    def test_iter_all_contacts_closes_response_when_abandoned(self, mocked_client):
         """
-        Test that download_all_contacts skips vCard when address-data tag is absent.
+        Test that iter_all_contacts closes the streamed response when the iterator
+        is closed before the end of the response, so the connection is released.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param mocked_client:
+        :type mocked_client:
         :return:
         :rtype:
         """
 
-        mock_session = Mock()
-        mock_response = Mock()
-        mock_response.text = """
-        <multistatus xmlns="DAV:">
-            <response>
-                <propstat>
-                    <prop>
-                    </prop>
-                </propstat>
-            </response>
-        </multistatus>
-        """
-        mock_response.raise_for_status = Mock()
-        mock_session.request.return_value = mock_response
-
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        client, session = mocked_client(
+            _multistatus(
+                (
+                    ("/1.vcf", "BEGIN:VCARD\nFN:John Doe\nEND:VCARD"),
+                    ("/2.vcf", "BEGIN:VCARD\nFN:Jane Doe\nEND:VCARD"),
+                )
+            )
         )
-        client.session = mock_session
+        response = session.responses[0]
 
-        vcards = client.download_all_contacts()
+        vcards = client.iter_all_contacts()
+        next(vcards)
 
-        assert vcards == []
+        assert not response.closed
 
+        vcards.close()
 
-class TestNextcloudWebDAVClientCreateGequdioContactXML:
+        assert response.closed
+
+
+class TestNextcloudWebDAVClientSyncContacts:
     """
-    Test cases for the NextcloudWebDAVClient.create_gequdio_contact_xml method.
+    Test cases for the NextcloudWebDAVClient.sync_contacts method.
     """
 
-    def test_generates_valid_xml_with_multiple_contacts(self, monkeypatch):
+    def test_downloads_all_contacts_and_writes_cache_on_first_run(
+        self, tmp_path, client
+    ):
         """
-        Test that create_gequdio_contact_xml generates valid XML with multiple contacts.
+        Test that sync_contacts performs a full sync without a cache and stores the
+        vCards together with the returned sync-token.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        cache_path = tmp_path / "cache.json"
+        client.session = StubSession(
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/1.vcf",
+                            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                    ),
+                    "token-1",
+                )
+            )
         )
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
-            "BEGIN:VCARD\nFN:Jane Smith\nTEL;TYPE=mobile:+987654321\nEND:VCARD",
+        contacts = client.sync_contacts(str(cache_path))
+
+        assert contacts == [("John Doe", [("123", ["cell"])])]
+        assert json.loads(cache_path.read_text(encoding="utf-8")) == {
+            "base_url": client.base_url,
+            "sync_token": "token-1",
+            "contacts": {"/1.vcf": ["John Doe", [["123", ["cell"]]]]},
+        }
+        assert client.session.calls == [
+            {
+                "method": "REPORT",
+                "url": client.base_url,
+                "data": ANY,
+                "headers": ANY,
+                "stream": True,
+                "verify": True,
+            }
         ]
+        assert b"<D:sync-token></D:sync-token>" in client.session.calls[-1]["data"]
 
-        xml_output = client.create_gequdio_contact_xml(vcards)
+    def test_applies_changes_and_deletions_to_cached_contacts(self, tmp_path, client):
+        """
+        Test that sync_contacts sends the cached sync-token and only applies the
+        reported changes and deletions to the cached contacts. A contact that no
+        longer has phone numbers is dropped from the cache.
 
-        assert "<Name>John Doe</Name>" in xml_output
-        assert "<Telephone>00123456789</Telephone>" in xml_output
-        assert "<Name>Jane Smith</Name>" in xml_output
-        assert "<Mobile>00987654321</Mobile>" in xml_output
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
+        :return:
+        :rtype:
+        """
+
+        cache_path = tmp_path / "cache.json"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "base_url": client.base_url,
+                    "sync_token": "token-1",
+                    "contacts": {
+                        "/1.vcf": ("John Doe", [("123", ["cell"])]),
+                        "/2.vcf": ("Jane Doe", [("123", ["cell"])]),
+                        "/3.vcf": ("Max Doe", [("123", ["cell"])]),
+                        "/4.vcf": ("Eve Doe", [("123", ["cell"])]),
+                    },
+                }
+            ),
+            encoding="utf-8",
+        )
+        client.session = StubSession(
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/2.vcf",
+                            "BEGIN:VCARD\nFN:Jane Roe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                        ("/3.vcf", None),
+                        ("/4.vcf", "BEGIN:VCARD\nFN:Eve Doe\nEND:VCARD"),
+                    ),
+                    "token-2",
+                )
+            )
+        )
+
+        contacts = client.sync_contacts(str(cache_path))
+
+        assert contacts == [
+            ("John Doe", [("123", ["cell"])]),
+            ("Jane Roe", [("123", ["cell"])]),
+        ]
+        assert (
+            b"<D:sync-token>token-1</D:sync-token>" in client.session.calls[-1]["data"]
+        )
+        assert json.loads(cache_path.read_text(encoding="utf-8"))["contacts"] == {
+            "/1.vcf": ["John Doe", [["123", ["cell"]]]],
+            "/2.vcf": ["Jane Roe", [["123", ["cell"]]]],
+        }
+        assert (
+            json.loads(cache_path.read_text(encoding="utf-8"))["sync_token"]
+            == "token-2"
+        )
 
-    def test_handles_empty_vcard_list(self, monkeypatch):
+    def test_falls_back_to_full_sync_when_sync_token_is_rejected(
+        self, tmp_path, client
+    ):
         """
-        Test that create_gequdio_contact_xml handles an empty vCard list.
+        Test that sync_contacts drops the cached vCards and downloads all of them
+        again when the server rejects the cached sync-token.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        cache_path = tmp_path / "cache.json"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "base_url": client.base_url,
+                    "sync_token": "expired",
+                    "contacts": {"/old.vcf": ("Old", [("123", ["cell"])])},
+                }
+            ),
+            encoding="utf-8",
+        )
+        rejected = StubResponse(b"", status_code=403)
+        client.session = StubSession(
+            rejected,
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/1.vcf",
+                            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                    ),
+                    "token-1",
+                )
+            ),
         )
 
-        xml_output = client.create_gequdio_contact_xml([])
-        root = ET.fromstring(xml_output)
+        contacts = client.sync_contacts(str(cache_path))
 
-        assert root.tag == "GEQUDIODirectory"
-        assert len(list(root)) == 0
+        assert contacts == [("John Doe", [("123", ["cell"])])]
+        assert len(client.session.calls) == 2
+        assert b"<D:sync-token></D:sync-token>" in client.session.calls[-1]["data"]
+        assert rejected.closed
 
-    def test_normalizes_phone_numbers_correctly(self, monkeypatch):
+    def test_continues_sync_while_result_is_truncated(self, tmp_path, client):
         """
-        Test that create_gequdio_contact_xml normalizes phone numbers correctly.
+        Test that sync_contacts repeats the REPORT with the returned sync-token as
+        long as the server reports the result as truncated.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
+        :return:
+        :rtype:
+        """
+
+        cache_path = tmp_path / "cache.json"
+        collection = "/remote.php/dav/addressbooks/users/user/contacts/"
+        client.session = StubSession(
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/1.vcf",
+                            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                    ),
+                    "token-1",
+                    collection,
+                )
+            ),
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/2.vcf",
+                            "BEGIN:VCARD\nFN:Jane Doe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                    ),
+                    "token-2",
+                )
+            ),
+        )
+
+        contacts = client.sync_contacts(str(cache_path))
+
+        assert contacts == [
+            ("John Doe", [("123", ["cell"])]),
+            ("Jane Doe", [("123", ["cell"])]),
+        ]
+        assert len(client.session.calls) == 2
+        assert b"<D:sync-token></D:sync-token>" in client.session.calls[0]["data"]
+        assert (
+            b"<D:sync-token>token-1</D:sync-token>" in client.session.calls[1]["data"]
+        )
+        assert (
+            json.loads(cache_path.read_text(encoding="utf-8"))["sync_token"]
+            == "token-2"
+        )
+
+    def test_raises_error_when_truncated_result_keeps_sync_token(
+        self, tmp_path, client
+    ):
+        """
+        Test that sync_contacts stops with an error instead of repeating the REPORT
+        forever when the server reports a truncated result without a new sync-token.
+
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        collection = "/remote.php/dav/addressbooks/users/user/contacts/"
+        body = _multistatus(
+            (("/1.vcf", "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell:123\nEND:VCARD"),),
+            "token-1",
+            collection,
         )
+        client.session = StubSession(StubResponse(body), StubResponse(body))
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+1 (234) 567-890\nEND:VCARD",
-        ]
+        with pytest.raises(RuntimeError, match="token-1"):
+            client.sync_contacts(str(tmp_path / "cache.json"))
 
-        xml_output = client.create_gequdio_contact_xml(vcards)
+        assert len(client.session.calls) == 2
+        assert not (tmp_path / "cache.json").exists()
+
+    def test_raises_http_error_without_cached_sync_token(self, tmp_path, client):
+        """
+        Test that sync_contacts does not retry a failed full sync.
+
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
+        :return:
+        :rtype:
+        """
+
+        client.session = StubSession(StubResponse(b"", status_code=403))
+
+        with pytest.raises(requests.HTTPError):
+            client.sync_contacts(str(tmp_path / "cache.json"))
 
-        assert "<Telephone>001234567890</Telephone>" in xml_output
+        assert len(client.session.calls) == 1
+        assert not (tmp_path / "cache.json").exists()
 
-    def test_assigns_other_tag_for_unknown_phone_types(self, monkeypatch):
+    def test_ignores_cache_of_another_address_book(self, tmp_path, client):
         """
-        Test that create_gequdio_contact_xml assigns Other tag for unknown phone types.
+        Test that sync_contacts performs a full sync when the cache was written for
+        another address book, instead of sending its sync-token to this one.
 
-        :param monkeypatch:
-        :type monkeypatch:
+        :param tmp_path:
+        :type tmp_path:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        cache_path = tmp_path / "cache.json"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "base_url": client.base_url.replace("/contacts/", "/other/"),
+                    "sync_token": "http://sabre.io/ns/sync/5",
+                    "contacts": {"/old.vcf": ("Old", [("123", ["cell"])])},
+                }
+            ),
+            encoding="utf-8",
+        )
+        client.session = StubSession(
+            StubResponse(
+                _multistatus(
+                    (
+                        (
+                            "/1.vcf",
+                            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell:123\nEND:VCARD",
+                        ),
+                    ),
+                    "token-1",
+                )
+            )
         )
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=fax:+123456789\nEND:VCARD",
-        ]
-
-        xml_output = client.create_gequdio_contact_xml(vcards)
+        contacts = client.sync_contacts(str(cache_path))
 
-        assert "<Other>00123456789</Other>" in xml_output
+        assert contacts == [("John Doe", [("123", ["cell"])])]
+        assert b"<D:sync-token></D:sync-token>" in client.session.calls[-1]["data"]
+        assert (
+            json.loads(cache_path.read_text(encoding="utf-8"))["base_url"]
+            == client.base_url
+        )
 
-    def test_writes_output_to_file_when_path_is_provided(self, tmp_path, monkeypatch):
+    @pytest.mark.parametrize(
+        "content",
+        [
+            "not json",
+            '{"sync_token": null, "contacts": {}}',
+            '{"sync_token": "token-0", "contacts": []}',
+        ],
+    )
+    def test_ignores_invalid_cache_file(self, tmp_path, client, content):
         """
-        Test that create_gequdio_contact_xml writes output to file when path is provided.
+        Test that sync_contacts performs a full sync when the cache file cannot be
+        read or does not have the expected structure.
 
         :param tmp_path:
         :type tmp_path:
-        :param monkeypatch:
-        :type monkeypatch:
+        :param client:
+        :type client:
+        :param content:
+        :type content:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
-        )
+        cache_path = tmp_path / "cache.json"
+        cache_path.write_text(content, encoding="utf-8")
+        client.session = StubSession(StubResponse(_multistatus((), "token-1")))
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
-        ]
+        contacts = client.sync_contacts(str(cache_path))
 
-        output_path = tmp_path / "output.xml"
-        client.create_gequdio_contact_xml(vcards, write_path=str(output_path))
+        assert contacts == []
+        assert b"<D:sync-token></D:sync-token>" in client.session.calls[-1]["data"]
 
-        assert output_path.read_text(encoding="utf-8").startswith('<?xml version="1.0"')
 
-    def test_creates_multiple_tag_elements_for_multiple_numbers_of_same_type(self):
+class TestNextcloudWebDAVClientCreateGequdioContactXML:
+    """
+    Test cases for the NextcloudWebDAVClient.create_gequdio_contact_xml method.
+    """
+
+    def test_generates_valid_xml_with_multiple_contacts(self, monkeypatch, client):
         """
-        Test that multiple TEL entries of the same type create multiple tag elements
-        and that both normalized numbers appear in the output XML.
+        Test that create_gequdio_contact_xml generates valid XML with multiple contacts.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
-        )
-
         vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+123456789\nTEL;TYPE=WORK:+987654321\nEND:VCARD",
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
+            "BEGIN:VCARD\nFN:Jane Smith\nTEL;TYPE=mobile:+987654321\nEND:VCARD",
         ]
 
         xml_output = client.create_gequdio_contact_xml(vcards)
-        root = ET.fromstring(xml_output)
-
-        telephones = root.findall(".//DirectoryEntry/Telephone")
-        values = [el.text for el in telephones]
 
-        assert values.count("00123456789") == 1
-        assert values.count("00987654321") == 1
-        assert len(telephones) == 2
+        assert "<Name>John Doe</Name>" in xml_output
+        assert "<Telephone>00123456789</Telephone>" in xml_output
+        assert "<Name>Jane Smith</Name>" in xml_output
+        assert "<Mobile>00987654321</Mobile>" in xml_output
 
-    def test_populates_existing_empty_tag_without_creating_duplicate_for_single_number(
-        self,
-    ):
+    def test_accepts_iterator_of_vcards(self, client):
         """
-        Test that when there is a single TEL entry of a given type the client
-        populates the existing tag (no duplicates are created).
+        Test that create_gequdio_contact_xml accepts an iterator of vCards.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        vcards = iter(
+            [
+                "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
+                "BEGIN:VCARD\nFN:Jane Smith\nTEL;TYPE=mobile:+987654321\nEND:VCARD",
+            ]
         )
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+1 (234) 567-890\nEND:VCARD",
-        ]
-
         xml_output = client.create_gequdio_contact_xml(vcards)
         root = ET.fromstring(xml_output)
 
-        telephones = root.findall(".//DirectoryEntry/Telephone")
-
-        assert len(telephones) == 1
-        assert telephones[0].text == "001234567890"
+        assert [el.text for el in root.findall("DirectoryEntry/Name")] == [
+            "Jane Smith",
+            "John Doe",
+        ]
 
-    def test_preserves_asterisk_in_phone_numbers(self):
+    def test_creates_xml_from_parsed_contacts(self, client):
         """
-        Test that '*' characters in phone numbers are preserved while other
-        non-numeric characters are removed and international '+' is normalized.
+        Test that create_gequdio_contact_xml_from_parsed sorts the parsed contacts
+        and drops the ones without phone numbers.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        client = NextcloudWebDAVClient(
-            url="https://example.com",
-            username="user",
-            password="pass",
-            addressbook="contacts",
+        xml_output = client.create_gequdio_contact_xml_from_parsed(
+            [
+                ("John Doe", [("123", ["cell"])]),
+                ("Max Doe", []),
+                ("jane Doe", [("456", ["work"])]),
+            ]
         )
+        root = ET.fromstring(xml_output)
 
-        vcards = [
-            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+44 123*456-78\nEND:VCARD",
+        assert [el.text for el in root.findall("DirectoryEntry/Name")] == [
+            "jane Doe",
+            "John Doe",
         ]
+        assert root.find("DirectoryEntry/Telephone").text == "456"
 
-        xml_output = client.create_gequdio_contact_xml(vcards)
-
-        assert "<Telephone>0044123*45678</Telephone>" in xml_output
-
-
-class TestNextcloudWebDAVClientHelperExtractTelTypes:
-    """
-    Test cases for the NextcloudWebDAVClient._extract_tel_types method.
-    """
-
-    def test_extracts_single_type_correctly(self):
+    def test_handles_empty_vcard_list(self, monkeypatch, client):
         """
-        Test that _extract_tel_types extracts a single type correctly.
+        Test that create_gequdio_contact_xml handles an empty vCard list.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=work:123456789"
-
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml([])
 
-        assert types == ["work"]
+        assert xml_output == (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            "<GEQUDIODirectory />\n"
+        )
 
-    def test_extracts_multiple_types_correctly(self):
+    def test_serializes_directory_like_elementtree(self, client):
         """
-        Test that _extract_tel_types extracts multiple types correctly.
+        Test that create_gequdio_contact_xml produces the same document
+        ElementTree did, including the short form for empty elements.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=work,cell:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:Tom & Jerry\nTEL;TYPE=cell:+49 123\n"
+            "TEL;TYPE=cell:456\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
 
-        assert types == ["work", "cell"]
+        assert xml_output == (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            "<GEQUDIODirectory><DirectoryEntry><Name>Tom &amp; Jerry</Name>"
+            "<Telephone /><Mobile>0049123</Mobile><Other /><Mobile>456</Mobile>"
+            "</DirectoryEntry></GEQUDIODirectory>\n"
+        )
 
-    def test_handles_key_without_type_parameter(self):
+    def test_skips_empty_vcards_and_contacts_without_phone_numbers(self, client):
         """
-        Test that _extract_tel_types handles a key without a TYPE parameter.
+        Test that create_gequdio_contact_xml skips empty vCards and contacts
+        without telephone numbers.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL:123456789"
+        vcards = [
+            "",
+            "BEGIN:VCARD\nFN:Jane Smith\nEMAIL:jane@example.com\nEND:VCARD",
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
+        root = ET.fromstring(xml_output)
 
-        assert types == []
+        assert [el.text for el in root.findall("DirectoryEntry/Name")] == ["John Doe"]
 
-    def test_ignores_empty_type_values(self):
+    def test_normalizes_phone_numbers_correctly(self, monkeypatch, client):
         """
-        Test that _extract_tel_types ignores empty type values.
+        Test that create_gequdio_contact_xml normalizes phone numbers correctly.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=,:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+1 (234) 567-890\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
 
-        assert types == []
+        assert "<Telephone>001234567890</Telephone>" in xml_output
 
-    def test_extracts_types_with_extra_parameters(self):
+    def test_assigns_other_tag_for_unknown_phone_types(self, monkeypatch, client):
         """
-        Test that _extract_tel_types extracts types with extra parameters.
+        Test that create_gequdio_contact_xml assigns Other tag for unknown phone types.
 
+        :param monkeypatch:
+        :type monkeypatch:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=work;PREF=1:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=fax:+123456789\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
 
-        assert types == ["work"]
+        assert "<Other>00123456789</Other>" in xml_output
 
-    def test_handles_whitespace_in_type_values(self):
+    def test_prefers_telephone_tag_over_mobile_tag_for_mixed_types(self, client):
         """
-        Test that _extract_tel_types handles whitespace in type values.
+        Test that create_gequdio_contact_xml prefers the Telephone tag when a number
+        has both work and cell types, regardless of the order of the types.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE= work , cell :123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=cell,work:+123456789\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
 
-        assert types == ["work", "cell"]
+        assert "<Telephone>00123456789</Telephone>" in xml_output
 
-    def test_handles_flag_style_parameters(self):
+    def test_escapes_special_characters_in_contact_name(self, client):
         """
-        Test that _extract_tel_types handles flag-style parameters.
+        Test that create_gequdio_contact_xml escapes XML special characters in the
+        contact name.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;HOME:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:Smith & <Sons>\nTEL;TYPE=work:+123456789\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        xml_output = client.create_gequdio_contact_xml(vcards)
+        root = ET.fromstring(xml_output)
 
-        assert types == ["home"]
+        assert "<Name>Smith &amp; &lt;Sons&gt;</Name>" in xml_output
+        assert root.find("DirectoryEntry/Name").text == "Smith & <Sons>"
 
-    def test_preserves_malformed_type_values(self):
+    def test_logs_summary_instead_of_each_contact(self, caplog, client):
         """
-        Test that _extract_tel_types preserves malformed type values.
+        Test that create_gequdio_contact_xml logs a single summary at info level and
+        the individual contacts only at debug level.
 
+        :param caplog:
+        :type caplog:
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=home=work:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
+            "BEGIN:VCARD\nFN:Jane Smith\nTEL;TYPE=mobile:+987654321\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        with caplog.at_level(
+            logging.INFO, logger="nextcloud_contacts_to_gequdio.nextcloud_to_gequdio"
+        ):
+            client.create_gequdio_contact_xml(vcards)
 
-        assert types == ["home=work"]
+        assert caplog.messages == ["Processed 2 contacts."]
 
-    def test_returns_empty_list_for_invalid_key(self):
+    def test_writes_output_to_file_when_path_is_provided(self, client):
         """
-        Test that _extract_tel_types returns an empty list for an invalid key.
+        Test that create_gequdio_contact_xml writes output to file when path is provided.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "INVALID_KEY"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:+123456789\nEND:VCARD",
+        ]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        with patch.object(Path, "write_text", autospec=True) as mock_write_text:
+            xml_output = client.create_gequdio_contact_xml(
+                vcards, write_path="output.xml"
+            )
 
-        assert types == []
+        assert xml_output.startswith('<?xml version="1.0"')
+        mock_write_text.assert_called_once_with(
+            Path("output.xml"), xml_output, encoding="utf-8"
+        )
 
-    def test_handles_key_with_no_parameters(self):
+    def test_creates_multiple_tag_elements_for_multiple_numbers_of_same_type(
+        self, client
+    ):
         """
-        Test that _extract_tel_types handles a key with no parameters.
+        Test that multiple TEL entries of the same type create multiple tag elements
+        and that both normalized numbers appear in the output XML.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+123456789\nTEL;TYPE=WORK:+987654321\nEND:VCARD",
+        ]
+
+        xml_output = client.create_gequdio_contact_xml(vcards)
+        root = ET.fromstring(xml_output)
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        telephones = root.findall(".//DirectoryEntry/Telephone")
+        values = [el.text for el in telephones]
 
-        assert types == []
+        assert values.count("00123456789") == 1
+        assert values.count("00987654321") == 1
+        assert len(telephones) == 2
 
-    def test_eturns_empty_list_when_key_is_none(self):
+    def test_populates_existing_empty_tag_without_creating_duplicate_for_single_number(
+        self, client
+    ):
         """
-        Test that _extract_tel_types returns an empty list when key is None.
+        Test that when there is a single TEL entry of a given type the client
+        populates the existing tag (no duplicates are created).
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = None
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+1 (234) 567-890\nEND:VCARD",
+        ]
+
+        xml_output = client.create_gequdio_contact_xml(vcards)
+        root = ET.fromstring(xml_output)
 
-        types = NextcloudWebDAVClient._extract_tel_types(
-            key  # pyrefly: ignore [bad-argument-type]
-        )
+        telephones = root.findall(".//DirectoryEntry/Telephone")
 
-        assert types == []
+        assert len(telephones) == 1
+        assert telephones[0].text == "001234567890"
 
-    def test_returns_empty_list_when_key_is_empty_string(self):
+    def test_skips_numbers_without_digits(self, client):
         """
-        Test that _extract_tel_types returns an empty list when key is an empty string.
+        Test that a TEL entry without any digits (e.g. "ext") does not take a node,
+        so neither an empty extra tag is created nor a following number is moved.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = ""
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=work:123\nTEL;TYPE=work:ext\n"
+            "TEL;TYPE=work:456\nEND:VCARD",
+        ]
+
+        xml_output = client.create_gequdio_contact_xml(vcards)
+        root = ET.fromstring(xml_output)
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        telephones = root.findall(".//DirectoryEntry/Telephone")
 
-        assert types == []
+        assert [telephone.text for telephone in telephones] == ["123", "456"]
 
-    def test_skips_processing_when_parameter_is_empty(self):
+    def test_preserves_asterisk_in_phone_numbers(self, client):
         """
-        Test that _extract_tel_types skips processing when a parameter is empty.
+        Test that '*' characters in phone numbers are preserved while other
+        non-numeric characters are removed and international '+' is normalized.
 
+        :param client:
+        :type client:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=work;:123456789"
+        vcards = [
+            "BEGIN:VCARD\nFN:John Doe\nTEL;TYPE=WORK:+44 123*456-78\nEND:VCARD",
+        ]
+
+        xml_output = client.create_gequdio_contact_xml(vcards)
+
+        assert "<Telephone>0044123*45678</Telephone>" in xml_output
+
+
+# TEL property keys with the expected result of
+# NextcloudWebDAVClient._extract_tel_types
+_TEL_TYPE_CASES = [
+    pytest.param(
+        "TEL;TYPE=work:123456789", ["work"], id="extracts_single_type_correctly"
+    ),
+    pytest.param(
+        "TEL;TYPE=work,cell:123456789",
+        ["work", "cell"],
+        id="extracts_multiple_types_correctly",
+    ),
+    pytest.param("TEL:123456789", [], id="handles_key_without_type_parameter"),
+    pytest.param("TEL;TYPE=,:123456789", [], id="ignores_empty_type_values"),
+    pytest.param(
+        "TEL;TYPE=work;PREF=1:123456789",
+        ["work"],
+        id="extracts_types_with_extra_parameters",
+    ),
+    pytest.param(
+        "TEL;TYPE= work , cell :123456789",
+        ["work", "cell"],
+        id="handles_whitespace_in_type_values",
+    ),
+    pytest.param("TEL;HOME:123456789", ["home"], id="handles_flag_style_parameters"),
+    pytest.param(
+        "TEL;TYPE=home=work:123456789",
+        ["home=work"],
+        id="preserves_malformed_type_values",
+    ),
+    pytest.param("INVALID_KEY", [], id="returns_empty_list_for_invalid_key"),
+    pytest.param("TEL:123456789", [], id="handles_key_with_no_parameters"),
+    pytest.param(
+        "TEL;TYPE=work,WORK;TYPE=cell;work:123456789",
+        ["work", "cell"],
+        id="deduplicates_repeated_types",
+    ),
+    pytest.param(None, [], id="returns_empty_list_when_key_is_none"),
+    pytest.param("", [], id="returns_empty_list_when_key_is_empty_string"),
+    pytest.param(
+        "TEL;TYPE=work;:123456789",
+        ["work"],
+        id="skips_processing_when_parameter_is_empty",
+    ),
+    pytest.param(
+        "TEL;TYPE=work; ;:123456789",
+        ["work"],
+        id="skips_processing_when_parameter_is_whitespace",
+    ),
+]
 
-        types = NextcloudWebDAVClient._extract_tel_types(key)
 
-        assert types == ["work"]
+class TestNextcloudWebDAVClientHelperExtractTelTypes:
+    """
+    Test cases for the NextcloudWebDAVClient._extract_tel_types method.
+    """
 
-    def test_skips_processing_when_parameter_is_whitespace(self):
+    @pytest.mark.parametrize("key,expected_types", _TEL_TYPE_CASES)
+    def test_extract_tel_types(self, key, expected_types):
         """
-        Test that _extract_tel_types skips processing when a parameter is whitespace.
+        Test that _extract_tel_types extracts the telephone types from a TEL key.
 
+        :param key:
+        :type key:
+        :param expected_types:
+        :type expected_types:
         :return:
         :rtype:
         """
 
-        key = "TEL;TYPE=work; ;:123456789"
-
-        types = NextcloudWebDAVClient._extract_tel_types(key)
+        types = NextcloudWebDAVClient._extract_tel_types(
+            key  # pyrefly: ignore [bad-argument-type]
+        )
 
-        assert types == ["work"]
+        assert types == expected_types
 
 
 class TestNextcloudWebDAVClientHelperUnfoldLines:
@@ -1183,9 +1659,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["TEL;TYPE=work:123456789", " 456"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["TEL;TYPE=work:123456789456"]
 
@@ -1198,9 +1672,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["TEL;TYPE=work:123", " 456", " 789"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["TEL;TYPE=work:123456789"]
 
@@ -1213,9 +1685,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["TEL;TYPE=work:123456789", "", " 456"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["TEL;TYPE=work:123456789456"]
 
@@ -1228,9 +1698,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["TEL;TYPE=work:123456789"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["TEL;TYPE=work:123456789"]
 
@@ -1243,9 +1711,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["FN:John Doe", " TEL;TYPE=work:123456789"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["FN:John Doe", "TEL;TYPE=work:123456789"]
 
@@ -1258,9 +1724,7 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["FN:John", " Doe"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["FN:John Doe"]
 
@@ -1273,12 +1737,110 @@ class TestNextcloudWebDAVClientHelperUnfoldLines:
         """
 
         lines = ["TEL;TYPE=work:123", "\t456"]
-        pattern = re.compile(r"^[A-Za-z0-9\-]+(?:;.*)?:")
-
-        unfolded = NextcloudWebDAVClient._unfold_lines(lines, pattern)
+        unfolded = NextcloudWebDAVClient._unfold_lines(lines, _PROP_RE)
 
         assert unfolded == ["TEL;TYPE=work:123456"]
 
+    def test_iter_unfolded_lines_yields_each_line_once_the_next_one_starts(self):
+        """
+        Test that _iter_unfolded_lines yields a logical line as soon as the next
+        property starts, without consuming the remaining input.
+
+        :return:
+        :rtype:
+        """
+
+        lines = iter(["FN:John", " Doe", "TEL:123", " 456", "END:VCARD"])
+        unfolded = NextcloudWebDAVClient._iter_unfolded_lines(lines, _PROP_RE)
+
+        assert next(unfolded) == "FN:John Doe"
+        assert next(lines) == " 456"
+        assert list(unfolded) == ["TEL:123", "END:VCARD"]
+
+
+# A typical address book entry, for the parser benchmark
+_BENCHMARK_VCARD = (
+    "BEGIN:VCARD\r\n"
+    "VERSION:3.0\r\n"
+    "PRODID:-//Sabre//Sabre VObject 4.5.4//EN\r\n"
+    "UID:4f1c2a9e-0b7d-4c55-9a63-5f0e3c1d8b21\r\n"
+    "FN:Dr. Erika Mustermann\r\n"
+    "N:Mustermann;Erika;;Dr.;\r\n"
+    "ORG:Example GmbH;Sales\r\n"
+    "TITLE:Head of Sales\r\n"
+    "EMAIL;TYPE=WORK:erika.mustermann@example.com\r\n"
+    "TEL;TYPE=WORK,VOICE:+49 (0) 30 1234567-0\r\n"
+    "TEL;TYPE=CELL:+49 170 1234567\r\n"
+    "TEL;TYPE=HOME:030 7654321\r\n"
+    "ADR;TYPE=WORK:;;Musterstra\u00dfe 1;Berlin;;10115;Germany\r\n"
+    "NOTE:Met at the trade fair\\, prefers calls in the morning and is usually\r\n"
+    " available until noon.\r\n"
+    "REV:2026-01-01T12:00:00Z\r\n"
+    "END:VCARD\r\n"
+)
+
+
+class TestNextcloudWebDAVClientParseVCardBenchmark:
+    """
+    Benchmark for the NextcloudWebDAVClient._parse_vcard method.
+
+    Deselected by default, run with `make benchmark` (pytest -m benchmark).
+    """
+
+    @pytest.mark.benchmark
+    def test_parse_vcard_throughput(self, benchmark):
+        """
+        Test that parsing 1000 vCards stays well within the time budget.
+
+        :param benchmark:
+        :type benchmark:
+        :return:
+        :rtype:
+        """
+
+        vcards = [_BENCHMARK_VCARD] * 1000
+
+        result = benchmark(
+            lambda: [NextcloudWebDAVClient._parse_vcard(vcard) for vcard in vcards]
+        )
+
+        assert len(result) == 1000
+        assert benchmark.stats.stats.mean < 0.1
+
+
+class TestPrecompiledPatterns:
+    """
+    Test cases for the regular expressions used while parsing vCards.
+    """
+
+    @pytest.mark.parametrize(
+        "function", ["compile", "sub", "match", "search", "fullmatch", "split"]
+    )
+    def test_processing_contacts_does_not_compile_patterns(self, client, function):
+        """
+        Test that parsing vCards and creating the XML only use the patterns
+        compiled at import time, without going through the re module functions.
+
+        :param client:
+        :type client:
+        :param function:
+        :type function:
+        :return:
+        :rtype:
+        """
+
+        vcard = (
+            "BEGIN:VCARD\nVERSION:3.0\nFN:John Doe\nN:Doe;John;;;\n"
+            "TEL;TYPE=work,voice:+49 (123) 456-7\n 89\nTEL;TYPE=cell:0171 23*4\n"
+            "TEL:ext\nEND:VCARD"
+        )
+
+        with patch(f"re.{function}") as mocked:
+            NextcloudWebDAVClient._parse_vcard(vcard)
+            client.create_gequdio_contact_xml([vcard])
+
+        mocked.assert_not_called()
+
 
 class TestMain:
     """
@@ -1301,7 +1863,10 @@ class TestMain:
             "addressbook": "contacts",
         }
         mock_client = MagicMock()
-        mock_client.download_all_contacts.return_value = ["vCard1", "vCard2"]
+        mock_client.sync_contacts.return_value = [
+            ("John Doe", [("123", ["cell"])]),
+            ("Jane Doe", [("456", ["work"])]),
+        ]
         mock_client_class.return_value = mock_client
 
         main()
@@ -1313,9 +1878,12 @@ class TestMain:
             password="pass",
             addressbook="contacts",
         )
-        mock_client.download_all_contacts.assert_called_once()
-        mock_client.create_gequdio_contact_xml.assert_called_once_with(
-            ["vCard1", "vCard2"], write_path="/path/to/gequdio.xml"
+        mock_client.sync_contacts.assert_called_once_with(
+            cache_path="/path/to/gequdio-cache.json"
+        )
+        mock_client.create_gequdio_contact_xml_from_parsed.assert_called_once_with(
+            mock_client.sync_contacts.return_value,
+            write_path="/path/to/gequdio.xml",
         )
 
     @patch("nextcloud_contacts_to_gequdio.nextcloud_to_gequdio.load_settings")
@@ -1368,15 +1936,18 @@ class TestMain:
             "addressbook": "contacts",
         }
         mock_client = MagicMock()
-        mock_client.download_all_contacts.return_value = []
+        mock_client.sync_contacts.return_value = []
         mock_client_class.return_value = mock_client
 
         main()
 
         mock_load_settings.assert_called_once_with("/path/to/settings.ini")
-        mock_client.download_all_contacts.assert_called_once()
-        mock_client.create_gequdio_contact_xml.assert_called_once_with(
-            [], write_path="/path/to/gequdio.xml"
+        mock_client.sync_contacts.assert_called_once_with(
+            cache_path="/path/to/gequdio-cache.json"
+        )
+        mock_client.create_gequdio_contact_xml_from_parsed.assert_called_once_with(
+            mock_client.sync_contacts.return_value,
+            write_path="/path/to/gequdio.xml",
         )
 
     @patch("nextcloud_contacts_to_gequdio.nextcloud_to_gequdio.load_settings")
@@ -1395,7 +1966,7 @@ class TestMain:
             "addressbook": "contacts",
         }
         mock_client = MagicMock()
-        mock_client.download_all_contacts.return_value = []
+        mock_client.sync_contacts.return_value = []
         mock_client_class.return_value = mock_client
 
         main()
@@ -1418,7 +1989,7 @@ class TestMain:
             "addressbook": "contacts",
         }
         mock_client = MagicMock()
-        mock_client.download_all_contacts.return_value = []
+        mock_client.sync_contacts.return_value = []
         mock_client_class.return_value = mock_client
 
         main()